@@ -1,24 +1,106 @@
-import os.path
-from copy import deepcopy
+import os
+import glob
+from functools import lru_cache
 from pkgutil import get_data
 from io import BytesIO
 import attr
 import numpy as np
 from scipy.io import loadmat
+from scipy.spatial import cKDTree
+
+from bayspar.utils import _readonly, _readonly_samples
 
 
 TRANSLATE_VAR = {'sst': 'SST', 'subt': 'subT'}
 
+# Most locations Draws remembers gridpoint indices for.
+INDEX_NEAR_CACHE_SIZE = 1024
+
+# Bump when the layout or dtype of cached .npy draws changes.
+NPY_CACHE_VERSION = 3
+
 
+@lru_cache(maxsize=32)
 def get_matlab_resource(resource, package='bayspar', **kwargs):
-    """Read flat MATLAB files as package resources, output for Numpy"""
+    """Read flat MATLAB files as package resources, output for Numpy
+
+    Results are cached. Do not modify the returned dict.
+    """
     with BytesIO(get_data(package, resource)) as fl:
         data = loadmat(fl, **kwargs)
     return data
 
 
+def _as_draws_dtype(x):
+    """Single-precision copy of double-precision draws, other arrays as-is
+
+    Posterior samples carry far less than float32 precision of information,
+    and halving their size halves memory traffic in predictions.
+    """
+    if x.dtype == np.float64:
+        return x.astype(np.float32)
+    return x
+
+
+def _npy_cache_dir():
+    """Directory for .npy copies of MATLAB package resources"""
+    cache_home = os.environ.get('XDG_CACHE_HOME',
+                                os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache_home, 'bayspar',
+                        'npy-v{}'.format(NPY_CACHE_VERSION))
+
+
+def _ensure_npy_cache(resource, varname, package='bayspar'):
+    """Get path to .npy copy of a MATLAB resource variable, writing if needed
+
+    The copy is named for the size and modification time of the packaged
+    file, so a different install or version of the data never reuses it.
+
+    Raises OSError if the packaged file cannot be found on disk, or the cache
+    cannot be written.
+    """
+    source = os.path.join(os.path.dirname(__file__), os.pardir,
+                          *resource.split('/'))
+    stat = os.stat(source)
+    stem = os.path.join(_npy_cache_dir(), package,
+                        os.path.splitext(resource)[0])
+    path = '{}-{}-{}.npy'.format(stem, stat.st_size, stat.st_mtime_ns)
+    if os.path.exists(path):
+        return path
+
+    # Bypass the in-memory cache, so the parsed file can be freed.
+    var = get_matlab_resource.__wrapped__(resource, package=package,
+                                          squeeze_me=True)
+    arr = np.ascontiguousarray(_as_draws_dtype(var[varname]))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as fl:
+            np.save(fl, arr)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    # Copies superseded by this one, e.g. from before an upgrade.
+    for old_path in glob.glob('{}-*.npy'.format(glob.escape(stem))):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+    return path
+
+
+@lru_cache(maxsize=32)
 def read_draws(flstr, drawtype):
     """Grab single squeezed array from package resources
+
+    The array is memory-mapped from a .npy copy of the MATLAB file, written
+    to the user cache directory on first use. If the cache cannot be used
+    the array is read into memory instead. The returned array is cached and
+    shared between callers, so it is read-only.
     """
     drawtype = drawtype.lower()
 
@@ -27,29 +109,77 @@ def read_draws(flstr, drawtype):
     varstr = TRANSLATE_VAR[drawtype]
     varstr_full = os.path.splitext(flstr)[0]
     resource_str = var_template.format(varstr, flstr)
-    var = get_matlab_resource(resource_str, squeeze_me=True)
-    return var[varstr_full]
+    try:
+        out = np.load(_ensure_npy_cache(resource_str, varstr_full),
+                      mmap_mode='r')
+    except OSError:
+        # Bypass the in-memory cache, so only the float32 copy is kept.
+        var = get_matlab_resource.__wrapped__(resource_str, squeeze_me=True)
+        out = _as_draws_dtype(var[varstr_full])
+        out.setflags(write=False)
+    return out
 
 
-@attr.s
+def _checked_lonlats(lats, lons):
+    """Stack lats and lons into an nx2 (lon, lat) array, checking bounds"""
+    lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+    lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+    bad = (lats < -90) | (lats > 90) | (lons <= -180) | (lons > 180)
+    if bad.any():
+        i = np.flatnonzero(bad)[0]
+        raise BadLatlonError(tuple([lats[i], lons[i]]))
+    return np.column_stack((lons, lats))
+
+
+@attr.s(slots=True)
 class Draws:
     """Spatially-aware modelparams draws
+
+    Arrays are read-only, so one instance can be shared by all callers.
     """
-    alpha_samples_comp = attr.ib()
-    beta_samples_comp = attr.ib()
-    tau2_samples = attr.ib()
-    locs_comp = attr.ib()
+    # Stored row-major float32, so each gridpoint's samples are one
+    # contiguous row.
+    alpha_samples_comp = attr.ib(converter=_readonly_samples)
+    beta_samples_comp = attr.ib(converter=_readonly_samples)
+    tau2_samples = attr.ib(converter=_readonly_samples)
+    locs_comp = attr.ib(converter=_readonly)
     _half_grid_space = attr.ib(default=10)
+    _tree = attr.ib(init=False, repr=False, eq=False)
+    # Repeated queries of the same location skip the tree. A plain dict,
+    # unlike an lru_cache bound to self, pickles and copies with the instance.
+    _index_near_cache = attr.ib(init=False, repr=False, eq=False,
+                                factory=dict)
+
+    def __attrs_post_init__(self):
+        # Tree over (lon, lat) gridpoints, queried with the Chebyshev (p=inf)
+        # metric so radius searches match the half-grid box around a point.
+        self._tree = cKDTree(self.locs_comp[:, :2])
 
     def _index_near(self, lat, lon):
         """Get gridpoint index nearest a lat lon
+
+        Returns a read-only 1d array of indices, usually just one.
         """
         if not (-90 <= lat <= 90) or not (-180 < lon <= 180):
             raise BadLatlonError(tuple([lat, lon]))
+        key = (float(lat), float(lon))
+        idx = self._index_near_cache.get(key)
+        if idx is None:
+            if len(self._index_near_cache) >= INDEX_NEAR_CACHE_SIZE:
+                self._index_near_cache.clear()
+            idx = self._query_index_near(*key)
+            self._index_near_cache[key] = idx
+        return idx
 
-        lon_adiff = np.abs(self.locs_comp[:, 0] - lon) <= self._half_grid_space
-        lat_adiff = np.abs(self.locs_comp[:, 1] - lat) <= self._half_grid_space
-        return np.where(lon_adiff & lat_adiff)
+    def _query_index_near(self, lat, lon):
+        """Query tree for gridpoint index nearest a lat lon
+        """
+        idx = self._tree.query_ball_point([lon, lat], r=self._half_grid_space,
+                                          p=np.inf)
+        idx = np.asarray(idx, dtype=np.intp)
+        # Cached and shared between calls.
+        idx.setflags(write=False)
+        return idx
 
     def find_nearest_latlon(self, lat, lon):
         """Find draws gridpoint nearest a given lat lon
@@ -63,10 +193,58 @@ class Draws:
         """Find alpha and beta samples nearest a given location
         """
         idx = self._index_near(lat, lon)
-        alpha_select = self.alpha_samples_comp[idx].squeeze()
-        beta_select = self.beta_samples_comp[idx].squeeze()
+        if idx.size == 1:
+            # Basic indexing gives views of the contiguous rows, no gather.
+            i = int(idx[0])
+            return self.alpha_samples_comp[i], self.beta_samples_comp[i]
+        alpha_select = np.take(self.alpha_samples_comp, idx, axis=0)
+        beta_select = np.take(self.beta_samples_comp, idx, axis=0)
         return alpha_select, beta_select
 
+    def find_alphabeta_batch(self, latlons):
+        """Find alpha and beta samples nearest each of many locations
+
+        Parameters
+        ----------
+        latlons : sequence
+            Sequence of n (lat, lon) locations.
+
+        Returns
+        -------
+        alpha_select : ndarray
+            An nxm array of alpha samples, a row for each location's gridpoint.
+        beta_select : ndarray
+            Corresponding nxm array of beta samples.
+        """
+        idx = self._index_nearest_batch(latlons)
+        return self.alpha_samples_comp[idx], self.beta_samples_comp[idx]
+
+    def find_nearest_latlon_batch(self, latlons):
+        """Find draws gridpoints nearest each of many locations
+
+        Parameters
+        ----------
+        latlons : sequence
+            Sequence of n (lat, lon) locations.
+
+        Returns
+        -------
+        latlon : ndarray
+            An nx2 array of (lat, lon) gridpoints, one for each location.
+        """
+        idx = self._index_nearest_batch(latlons)
+        return self.locs_comp[idx, ::-1]
+
+    def _index_nearest_batch(self, latlons):
+        """Get the one gridpoint index nearest each of many (lat, lon)
+        """
+        latlons = np.asarray(latlons, dtype=np.float64).reshape(-1, 2)
+        lonlats = _checked_lonlats(latlons[:, 0], latlons[:, 1])
+        # Nearest gridpoint under the same Chebyshev metric as _index_near,
+        # so exactly one gridpoint per location.
+        _, idx = self._tree.query(lonlats, k=1, p=np.inf)
+        return idx
+
 
 class BadLatlonError(Exception):
     """Raised when latitude or longitude is outside (-90, 90) or (-180, 180)
@@ -80,22 +258,23 @@ class BadLatlonError(Exception):
         self.latlon = latlon
 
 
-draws_sst = Draws(alpha_samples_comp=read_draws('alpha_samples_comp.mat', 'sst'),
-                  beta_samples_comp=read_draws('beta_samples_comp.mat', 'sst'),
-                  tau2_samples=read_draws('tau2_samples.mat', 'sst'),
-                  locs_comp=read_draws('Locs_Comp.mat', 'sst'))
-
+@lru_cache(maxsize=None)
+def _load_draws(drawtype):
+    """Read Draws instance for a draw type from package resources
 
-draws_subt = Draws(alpha_samples_comp=read_draws('alpha_samples_comp.mat', 'subt'),
-                   beta_samples_comp=read_draws('beta_samples_comp.mat', 'subt'),
-                   tau2_samples=read_draws('tau2_samples.mat', 'subt'),
-                   locs_comp=read_draws('Locs_Comp.mat', 'subt'))
+    Loaded on first request and cached, so the MATLAB files for a draw type
+    are only parsed if that draw type is used.
+    """
+    return Draws(alpha_samples_comp=read_draws('alpha_samples_comp.mat', drawtype),
+                 beta_samples_comp=read_draws('beta_samples_comp.mat', drawtype),
+                 tau2_samples=read_draws('tau2_samples.mat', drawtype),
+                 locs_comp=read_draws('Locs_Comp.mat', drawtype))
 
 
 def get_draws(drawtype):
     """Get Draws instance for a draw type
+
+    The instance and its read-only sample arrays are shared between callers.
     """
-    if drawtype == 'sst':
-        return deepcopy(draws_sst)
-    elif drawtype == 'subt':
-        return deepcopy(draws_subt)
+    if drawtype in ('sst', 'subt'):
+        return _load_draws(drawtype)
@@ -1,13 +1,17 @@
-from copy import deepcopy
+from functools import lru_cache
 from pkgutil import get_data
 from io import BytesIO
 
 import attr
 import numpy as np
 from scipy.io import loadmat
+from scipy.spatial import cKDTree
+
+from bayspar.utils import _readonly
 
 
 TRANSLATE_VAR = {'sst': 'SST', 'subt': 'subT'}
+EARTH_RADIUS = 6378.137  # in km
 
 
 def get_matlab_resource(resource, package='bayspar', **kwargs):
@@ -43,9 +47,10 @@ def read_tex(obstype):
     var_str = TRANSLATE_VAR[obstype]
     var = get_matlab_resource(var_template.format(var_str))['Data_Input']
 
-    locs = var['Locs'].squeeze().item()
-    obs_stack = var['Obs_Stack'].squeeze().item()
-    inds_stack = var['Inds_Stack'].squeeze().item()
+    # MATLAB writes column-major; store row-major with native index ints.
+    locs = np.ascontiguousarray(var['Locs'].squeeze().item())
+    obs_stack = np.ascontiguousarray(var['Obs_Stack'].squeeze().item(), dtype=np.float64)
+    inds_stack = np.ascontiguousarray(var['Inds_Stack'].squeeze().item(), dtype=np.intp)
     obslocs = np.array([x[...].squeeze() for x in var['ObsLocs'].item().ravel() if x.any()])
     return locs, obs_stack, inds_stack, obslocs
 
@@ -71,7 +76,7 @@ def chord_distance(latlon1, latlon2):
     .. [1] https://en.wikipedia.org/wiki/Chord_(geometry)
 
     """
-    earth_radius = 6378.137  # in km
+    earth_radius = EARTH_RADIUS
 
     latlon1 = np.atleast_2d(latlon1)
     latlon2 = np.atleast_2d(latlon2)
@@ -79,30 +84,55 @@ def chord_distance(latlon1, latlon2):
     n = latlon1.shape[0]
     m = latlon2.shape[0]
 
-    paired = np.hstack((np.kron(latlon1, np.ones((m, 1))),
-                        np.kron(np.ones((n, 1)), latlon2)))
-
-    latdif = np.deg2rad(paired[:, 0] - paired[:, 2])
-    londif = np.deg2rad(paired[:, 1] - paired[:, 3])
+    # Broadcast latlon1 down rows against latlon2 across columns rather than
+    # materializing every pair.
+    lat1 = np.deg2rad(latlon1[:, 0])[:, np.newaxis]
+    lon1 = np.deg2rad(latlon1[:, 1])[:, np.newaxis]
+    lat2 = np.deg2rad(latlon2[:, 0])[np.newaxis, :]
+    lon2 = np.deg2rad(latlon2[:, 1])[np.newaxis, :]
 
-    a = np.sin(latdif / 2) ** 2
-    b = np.cos(np.deg2rad(paired[:, 0]))
-    c = np.cos(np.deg2rad(paired[:, 2]))
-    d = np.sin(np.abs(londif) / 2) ** 2
+    a = np.sin((lat1 - lat2) / 2) ** 2
+    b = np.cos(lat1)
+    c = np.cos(lat2)
+    d = np.sin(np.abs(lon1 - lon2) / 2) ** 2
 
     half_angles = np.arcsin(np.sqrt(a + b * c * d))
 
     dists = 2 * earth_radius * np.sin(half_angles)
 
+    # Same (m, n) reshape of the row-major pairwise grid as before, a view.
     return dists.reshape(m, n)
 
 
+def _latlon_to_xyz(latlon):
+    """Cartesian coordinates (km) of latlon points on Earth's surface
+
+    Euclidean distance between these points is the chordal distance given by
+    :func:`chord_distance`.
+    """
+    latlon = np.deg2rad(np.atleast_2d(latlon))
+    lat = latlon[:, 0]
+    lon = latlon[:, 1]
+    xyz = np.column_stack((np.cos(lat) * np.cos(lon),
+                           np.cos(lat) * np.sin(lon),
+                           np.sin(lat)))
+    return EARTH_RADIUS * xyz
+
+
 @attr.s
 class SeaTempObs:
     """Observed sea temperature fields as used in calibration
     """
-    st_obs_ave_vec = attr.ib()
-    locs_st_obs = attr.ib()
+    st_obs_ave_vec = attr.ib(converter=_readonly)
+    locs_st_obs = attr.ib(converter=_readonly)
+    _xyz = attr.ib(init=False, repr=False, eq=False)
+    _tree = attr.ib(init=False, repr=False, eq=False)
+
+    def __attrs_post_init__(self):
+        # Observations are (lon, lat). Euclidean distances between these
+        # cached points, including within the tree, are chordal distances.
+        self._xyz = _readonly(_latlon_to_xyz(self.locs_st_obs[:, ::-1]))
+        self._tree = cKDTree(self._xyz)
 
     def distance_from(self, lat, lon):
         """Chordal distance (km) of observations from latlon
@@ -115,14 +145,13 @@ class SeaTempObs:
         Returns
         -------
         d : ndarray
-            An nx1 array of distances (km) between latlon and the (n) observed
+            A 1d array (n) of distances (km) between latlon and the (n) observed
             points.
         """
         lat = float(lat)
         lon = float(lon)
-        latlon = np.array([[lat, lon]])
-        d = chord_distance(latlon, self.locs_st_obs[:, ::-1])
-        return d
+        diff = self._xyz - _latlon_to_xyz([lat, lon])
+        return np.sqrt(np.einsum('ij,ij->i', diff, diff))
 
     def get_close_obs(self, lat, lon, distance=500, min_obs=1):
         """Get observations closest to a latlon point
@@ -150,33 +179,50 @@ class SeaTempObs:
         distance = float(distance)
         min_obs = int(min_obs)
 
-        d = self.distance_from(lat, lon)
-        assert d.size == self.st_obs_ave_vec.size
+        q = _latlon_to_xyz([lat, lon])[0]
 
-        sort_idx = np.argsort(d.flat, axis=0)
-        d_sorted = d.flat[sort_idx]
-        obs_sorted = self.st_obs_ave_vec[sort_idx]
+        idx = np.asarray(self._tree.query_ball_point(q, r=distance),
+                         dtype=np.intp)
+        d = np.linalg.norm(self._xyz[idx] - q, axis=1)
+        in_buffer = d < distance
+        idx = idx[in_buffer]
+        d = d[in_buffer]
 
-        n_in_buffer = (d < distance).sum()
+        n_in_buffer = idx.size
         assert n_in_buffer > 0
 
-        msk = np.empty(self.st_obs_ave_vec.shape, dtype=bool)
-        msk.fill(0)
         if n_in_buffer > min_obs:
-            msk = d_sorted < distance
+            sort_idx = np.argsort(d)
+            d_sorted = d[sort_idx]
+            obs_idx = idx[sort_idx]
         else:
-            msk[:min_obs] = True
+            # Asking for more than all obs gives all of them.
+            k = min(min_obs, len(self._xyz))
+            d_sorted, obs_idx = self._tree.query(q, k=k)
+            d_sorted = np.atleast_1d(d_sorted)
+            obs_idx = np.atleast_1d(obs_idx)
+            # The tree pads missing neighbors with index len(self._xyz).
+            found = obs_idx < len(self._xyz)
+            d_sorted = d_sorted[found]
+            obs_idx = obs_idx[found]
 
-        return obs_sorted[msk], d_sorted[msk]
+        return self.st_obs_ave_vec[obs_idx], d_sorted
 
 
 @attr.s
 class TexObs:
     """Observed TEX86 values"""
-    locs = attr.ib()
-    obs_stack = attr.ib()
-    inds_stack = attr.ib()
-    obslocs = attr.ib()
+    locs = attr.ib(converter=_readonly)
+    obs_stack = attr.ib(converter=_readonly)
+    inds_stack = attr.ib(converter=_readonly)
+    obslocs = attr.ib(converter=_readonly)
+    _vals_mean = attr.ib(init=False, repr=False, eq=False)
+
+    def __attrs_post_init__(self):
+        # Mean of the stacked obs at each location, found once rather than on
+        # every search. inds_stack was written with 1-based indices into locs.
+        self._vals_mean = _readonly([self.obs_stack[self.inds_stack == kk].mean()
+                                     for kk in range(1, len(self.locs) + 1)])
 
     def find_within_tolerance(self, x, tolerance):
         """Find mean TEX86 observations that are within ± tolerance from x
@@ -196,46 +242,35 @@ class TexObs:
         vals_match : ndarray
             A 1d array (n) of corresponding TEX86 averages from each match.
         """
-        n_bg = len(self.locs)
-
         upper_bound = x + tolerance
         lower_bound = x - tolerance
 
-        inder_g = []
-        vals_match = []
+        inder_g = np.flatnonzero((lower_bound <= self._vals_mean)
+                                 & (self._vals_mean <= upper_bound))
 
-        for kk in range(1, n_bg + 1):  # ...data was written to 1-based idx
-            # Find the tex obs corresponding to this index location, using the
-            # stacked obs:
-            vals = self.obs_stack[self.inds_stack == kk]
-            vals_mean = vals.mean()
+        latlon_match = [tuple(x) for x in self.locs[inder_g, ::-1].tolist()]
+        return latlon_match, self._vals_mean[inder_g]
 
-            if lower_bound <= vals_mean <= upper_bound:
-                idx = kk - 1  # Back to 0-based idx
-                inder_g.append(idx)
-                vals_match.append(vals_mean)
 
-        latlon_match = [tuple(x) for x in self.locs[inder_g, ::-1].tolist()]
-        return latlon_match, np.array(vals_match)
+@lru_cache(maxsize=None)
+def _load_seatemp(obstype):
+    """Read and cache SeaTempObs instance for observation type"""
+    return SeaTempObs(*read_seatemp(obstype))
 
 
-seatemp_sst = SeaTempObs(*read_seatemp('sst'))
-seatemp_subt = SeaTempObs(*read_seatemp('subt'))
-tex_sst = TexObs(*read_tex('sst'))
-tex_subt = TexObs(*read_tex('subt'))
+@lru_cache(maxsize=None)
+def _load_tex(obstype):
+    """Read and cache TexObs instance for observation type"""
+    return TexObs(*read_tex(obstype))
 
 
 def get_seatemp(obstype):
-    """Get SeaTempObs instance for observation type"""
-    if obstype == 'sst':
-        return deepcopy(seatemp_sst)
-    elif obstype == 'subt':
-        return deepcopy(seatemp_subt)
+    """Get shared, read-only SeaTempObs instance for observation type"""
+    if obstype in ('sst', 'subt'):
+        return _load_seatemp(obstype)
 
 
 def get_tex(obstype):
-    """Get TexObs instance for observation type"""
-    if obstype == 'sst':
-        return deepcopy(tex_sst)
-    elif obstype == 'subt':
-        return deepcopy(tex_subt)
+    """Get shared, read-only TexObs instance for observation type"""
+    if obstype in ('sst', 'subt'):
+        return _load_tex(obstype)
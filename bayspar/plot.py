@@ -1,8 +1,7 @@
 import numpy as np
-import scipy.stats as stats
-import matplotlib.pylab as plt
-import cartopy.crs as ccrs
-import cartopy.feature as cfeature
+
+# matplotlib, cartopy and scipy.stats are slow to import, so they are
+# imported inside the functions that use them.
 
 from bayspar.observations import get_tex
 
@@ -21,6 +20,10 @@ def _default_map_ax(gca_kws=None, add_feature_kws=None):
     -------
     ax: matplotlib.Axes instance.
     """
+    import matplotlib.pyplot as plt
+    import cartopy.crs as ccrs
+    import cartopy.feature as cfeature
+
     if gca_kws is None:
         gca_kws = {'projection': ccrs.Robinson(central_longitude=0)}
 
@@ -37,6 +40,8 @@ def _default_map_ax(gca_kws=None, add_feature_kws=None):
 def map_texobs(ax=None, texobs=None, obstype=None):
     """Plot a map of TEX86 observations
     """
+    import cartopy.crs as ccrs
+
     if texobs is None:
         texobs = get_tex(obstype)
 
@@ -51,6 +56,8 @@ def map_texobs(ax=None, texobs=None, obstype=None):
 def map_site(prediction, latlon=None, ax=None):
     """Plot a map of prediction site location
     """
+    import cartopy.crs as ccrs
+
     if latlon is not None:
         latlon = latlon
     else:
@@ -67,12 +74,14 @@ def map_site(prediction, latlon=None, ax=None):
 def map_analog_boxes(prediction, ax=None):
     """Plot map of grids used for analog prediction
     """
+    import cartopy.crs as ccrs
+
     if ax is None:
         ax = _default_map_ax()
 
     ys, xs = get_grid_corners(prediction.analog_gridpoints)
-    for y, x in zip(ys, xs):
-        ax.plot(x, y, transform=ccrs.PlateCarree(), color='black', zorder=4)
+    # One line per grid box, drawn with a single call.
+    ax.plot(xs.T, ys.T, transform=ccrs.PlateCarree(), color='black', zorder=4)
 
     return ax
 
@@ -89,22 +98,19 @@ def get_grid_corners(latlons, halfgrid=10):
 
     Returns
     -------
-    ys : list
-        List containing 5-element tuples for latitude of each grid point.
-    xs : list
-        List containing 5-element tuples for longitude of each grid point.
+    ys : ndarray
+        An nx5 array of latitudes tracing each grid's corners, closing on the
+        first corner.
+    xs : ndarray
+        Corresponding nx5 array of longitudes.
     """
-    ys = []
-    xs = []
-    for lat, lon in latlons:
-        y = tuple([lat - halfgrid, lat - halfgrid,
-                   lat + halfgrid, lat + halfgrid,
-                   lat - halfgrid])
-        x = tuple([lon - halfgrid, lon + halfgrid,
-                   lon + halfgrid, lon - halfgrid,
-                   lon - halfgrid])
-        ys.append(y)
-        xs.append(x)
+    latlons = np.asarray(latlons, dtype=np.float64).reshape(-1, 2)
+    lat = latlons[:, :1]
+    lon = latlons[:, 1:]
+    dy = np.array([-1, -1, 1, 1, -1]) * halfgrid
+    dx = np.array([-1, 1, 1, -1, -1]) * halfgrid
+    ys = lat + dy
+    xs = lon + dx
     return ys, xs
 
 
@@ -129,6 +135,8 @@ def predictplot(prediction, ylabel=None, x=None, xlabel=None, spaghetti=False, a
     -------
     ax : matplotlib.Axes
     """
+    import matplotlib.pyplot as plt
+
     if ax is None:
         ax = plt.gca()
 
@@ -212,6 +220,9 @@ def densityplot(prediction, x=None, xlabel=None, ax=None):
     -------
     ax : matplotlib.Axes
     """
+    import matplotlib.pyplot as plt
+    import scipy.stats as stats
+
     if ax is None:
         ax = plt.gca()
 
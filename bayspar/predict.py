@@ -1,9 +1,8 @@
 import numpy as np
 import attr
 import attr.validators as av
-from tqdm import tqdm
 
-from bayspar.utils import target_timeseries_pred
+from bayspar.utils import target_timeseries_pred_batch, _as_rng
 from bayspar.modelparams import get_draws
 from bayspar.observations import get_seatemp, get_tex
 
@@ -60,17 +59,39 @@ class Prediction:
         """
         if q is None:
             q = [5, 50, 95]
-        q = np.array(q, dtype=np.float64, copy=True)
+
+        if interpolation == 'nearest' and np.ndim(q) <= 1:
+            return self._percentile_nearest(q)
 
         # Because analog ensembles have 3 dims
-        target_axis = list(range(self.ensemble.ndim))[1:]
+        target_axis = tuple(range(1, self.ensemble.ndim))
 
         perc = np.percentile(self.ensemble, q=q, axis=target_axis,
                              interpolation=interpolation)
         return perc.T
 
+    def _percentile_nearest(self, q):
+        """Same as numpy.percentile(..., interpolation='nearest'), from one
+        sort of the ensemble members per call for all q"""
+        q = np.asarray(q, dtype=np.float64)
+        if np.any((q < 0) | (q > 100)):
+            raise ValueError('Percentiles must be in the range [0, 100]')
+
+        members = self.ensemble.reshape(len(self.ensemble), -1)
+        sorted_members = np.sort(members, axis=1)
+
+        idx = np.around(q / 100 * (sorted_members.shape[1] - 1)).astype(np.intp)
+        perc = sorted_members[:, idx]
 
-def predict_tex(seatemp, lat, lon, temptype, nens=5000):
+        # NaN sorts last. Like numpy.percentile, any NaN in a row makes all of
+        # its percentiles NaN.
+        has_nan = np.isnan(sorted_members[:, -1])
+        if has_nan.any():
+            perc = np.where(has_nan.reshape((-1,) + (1,) * idx.ndim), np.nan, perc)
+        return perc
+
+
+def predict_tex(seatemp, lat, lon, temptype, nens=5000, out=None, rng=None):
     """Predict TEX86 from sea temperature
 
     Parameters
@@ -86,6 +107,14 @@ def predict_tex(seatemp, lat, lon, temptype, nens=5000):
         Type of sea temperature used. Either 'sst' for sea-surface or 'subt'.
     nens : int
         Size of MCMC ensemble draws to use for calculation.
+    out : ndarray or None, optional
+        (n, nens) float array to write the ensemble into, e.g. to reuse memory
+        across many predictions. The returned Prediction's ensemble is `out`.
+        A float32 array halves memory use, at single precision.
+    rng : int, numpy.random.Generator, numpy.random.RandomState or None, optional
+        Source of random numbers, or a seed for ``numpy.random.default_rng``
+        (a RandomState with numpy < 1.17).
+        If None, the global ``numpy.random`` state is used.
 
     Returns
     -------
@@ -95,6 +124,7 @@ def predict_tex(seatemp, lat, lon, temptype, nens=5000):
     ------
     EnsembleSizeError
     """
+    rng = _as_rng(rng)
     draws = get_draws(temptype)
 
     nd = len(seatemp)
@@ -108,22 +138,32 @@ def predict_tex(seatemp, lat, lon, temptype, nens=5000):
 
     grid_latlon = draws.find_nearest_latlon(lat=lat, lon=lon)
 
-    tex = np.empty((nd, nens))
-    for i in range(nens):
-        tau2_now = tau2_samples[i]
-        beta_now = beta_samples_comp[i]
-        alpha_now = alpha_samples_comp[i]
-        tex[:, i] = np.random.normal(seatemp * beta_now + alpha_now,
-                                     np.sqrt(tau2_now))
-
-    output = Prediction(ensemble=tex,
+    tau2_now = tau2_samples[:nens]
+    beta_now = beta_samples_comp[:nens]
+    alpha_now = alpha_samples_comp[:nens]
+    if out is None:
+        out = np.empty((nd, nens))
+    elif out.shape != (nd, nens):
+        raise ValueError('out has shape {}, expected {}'.format(out.shape, (nd, nens)))
+
+    # Draw all members at once, member-major so the random stream matches
+    # drawing one member at a time. The mean is built in place in `out`.
+    tex_t = out.T
+    np.multiply.outer(beta_now, seatemp, out=tex_t)
+    tex_t += alpha_now[:, np.newaxis]
+    noise = rng.standard_normal((nens, nd))
+    noise *= np.sqrt(tau2_now)[:, np.newaxis]
+    tex_t += noise
+
+    output = Prediction(ensemble=out,
                         temptype=temptype,
                         latlon=(lat, lon),
                         modelparam_gridpoints=[tuple(grid_latlon)])
     return output
 
 
-def predict_seatemp(tex, lat, lon, prior_std, temptype, prior_mean=None, nens=5000):
+def predict_seatemp(tex, lat, lon, prior_std, temptype, prior_mean=None, nens=5000, out=None,
+                    rng=None):
     """Predict sea temperature with TEX86
 
     Parameters
@@ -143,6 +183,14 @@ def predict_seatemp(tex, lat, lon, prior_std, temptype, prior_mean=None, nens=50
         by searching for a "close" value in observed sea temperature records.
     nens : int
         Size of MCMC ensemble draws to use for calculation.
+    out : ndarray or None, optional
+        (n, nens) float array to write the ensemble into, e.g. to reuse memory
+        across many predictions. The returned Prediction's ensemble is `out`.
+        A float32 array halves memory use, at single precision.
+    rng : int, numpy.random.Generator, numpy.random.RandomState or None, optional
+        Source of random numbers, or a seed for ``numpy.random.default_rng``
+        (a RandomState with numpy < 1.17).
+        If None, the global ``numpy.random`` state is used.
 
     Returns
     -------
@@ -155,7 +203,6 @@ def predict_seatemp(tex, lat, lon, prior_std, temptype, prior_mean=None, nens=50
     draws = get_draws(temptype)
     obs = get_seatemp(temptype)
 
-    nd = len(tex)
     ntk = draws.alpha_samples_comp.shape[1]
     if ntk < nens:
         raise EnsembleSizeError(ntk, nens)
@@ -169,17 +216,16 @@ def predict_seatemp(tex, lat, lon, prior_std, temptype, prior_mean=None, nens=50
 
     grid_latlon = draws.find_nearest_latlon(lat=lat, lon=lon)
 
-    prior_par = {'mu': np.ones(nd) * prior_mean,
-                 'inv_cov': np.eye(nd) * prior_std ** -2}
+    prior_par = {'mu': prior_mean,
+                 'inv_cov_diag': prior_std ** -2}
 
-    preds = np.empty((nd, nens))
-    for jj in range(nens):
-        preds[:, jj] = target_timeseries_pred(alpha_now=alpha_samples_comp[jj],
-                                              beta_now=beta_samples_comp[jj],
-                                              tau2_now=tau2_samples[jj],
-                                              proxy_ts=tex,
-                                              prior_pars=prior_par)
-        # TODO(brews): Consider a progress bar for this loop.
+    preds = target_timeseries_pred_batch(alpha=alpha_samples_comp[:nens],
+                                         beta=beta_samples_comp[:nens],
+                                         tau2=tau2_samples[:nens],
+                                         proxy_ts=tex,
+                                         prior_pars=prior_par,
+                                         out=out,
+                                         rng=rng)
 
     output = Prediction(ensemble=preds,
                         temptype=temptype,
@@ -190,7 +236,8 @@ def predict_seatemp(tex, lat, lon, prior_std, temptype, prior_mean=None, nens=50
     return output
 
 
-def predict_seatemp_analog(tex, prior_std, temptype, search_tol, prior_mean=None, nens=5000, progressbar=True):
+def predict_seatemp_analog(tex, prior_std, temptype, search_tol, prior_mean=None, nens=5000, progressbar=True,
+                           rng=None):
     """Predict sea temperature with TEX86, using the analog method
 
     Parameters
@@ -209,8 +256,12 @@ def predict_seatemp_analog(tex, prior_std, temptype, search_tol, prior_mean=None
     nens : int
         Size of MCMC ensemble draws to use for calculation.
     progressbar: bool
-        Whether or not to display a progress bar on the command line. The bar
-        shows how many analogs have been completed.
+        Ignored. All analogs are now computed in a single vectorized step, so
+        there is no progress to display. Kept for backwards compatibility.
+    rng : int, numpy.random.Generator, numpy.random.RandomState or None, optional
+        Source of random numbers, or a seed for ``numpy.random.default_rng``
+        (a RandomState with numpy < 1.17).
+        If None, the global ``numpy.random`` state is used.
 
     Returns
     -------
@@ -219,41 +270,35 @@ def predict_seatemp_analog(tex, prior_std, temptype, search_tol, prior_mean=None
     Raises
     ------
     EnsembleSizeError
+    NoAnalogsError
     """
-    draws = get_draws(temptype)
     tex_obs = get_tex(temptype)
 
-    nd = len(tex)
+    # Search first, so nothing else is loaded if there are no analogs.
+    latlon_match, val_match = tex_obs.find_within_tolerance(x=tex.mean(),
+                                                            tolerance=search_tol)
+    n_locs_g = len(latlon_match)
+    if n_locs_g == 0:
+        raise NoAnalogsError(search_tol)
+
+    draws = get_draws(temptype)
+
     ntk = draws.alpha_samples_comp.shape[1]
     if ntk < nens:
         raise EnsembleSizeError(ntk, nens)
 
-    latlon_match, val_match = tex_obs.find_within_tolerance(x=tex.mean(),
-                                                            tolerance=search_tol)
-    n_locs_g = len(latlon_match)
+    prior_par = {'mu': prior_mean,
+                 'inv_cov_diag': prior_std ** -2}
+
+    alpha_all, beta_all = draws.find_alphabeta_batch(latlon_match)
 
-    prior_par = {'mu': np.ones(nd) * prior_mean,
-                 'inv_cov': np.eye(nd) * prior_std ** -2}
-
-    n_latlon_matches = len(latlon_match)
-    indices = range(n_latlon_matches)
-
-    if progressbar:
-        indices = tqdm(indices, total=n_latlon_matches)
-
-    preds = np.empty((nd, n_locs_g, nens))
-    for kk in indices:
-        latlon = latlon_match[kk]
-        alpha_samples, beta_samples = draws.find_alphabeta_near(*latlon)
-        for jj in range(nens):
-            a_now = alpha_samples[jj]
-            b_now = beta_samples[jj]
-            t2_now = draws.tau2_samples[jj]
-            preds[:, kk, jj] = target_timeseries_pred(alpha_now=a_now,
-                                                      beta_now=b_now,
-                                                      tau2_now=t2_now,
-                                                      proxy_ts=tex,
-                                                      prior_pars=prior_par)
+    # All analogs in one go; tau2 draws are shared across gridpoints.
+    preds = target_timeseries_pred_batch(alpha=alpha_all[:, :nens],
+                                         beta=beta_all[:, :nens],
+                                         tau2=draws.tau2_samples[:nens],
+                                         proxy_ts=tex,
+                                         prior_pars=prior_par,
+                                         rng=rng)
 
     output = Prediction(ensemble=preds,
                         temptype=temptype,
@@ -276,3 +321,15 @@ class EnsembleSizeError(Exception):
     def __init__(self, available_size, requested_size):
         self.available_size = available_size
         self.requested_size = requested_size
+
+
+class NoAnalogsError(Exception):
+    """Raised when no analog locations are found within the search tolerance
+
+    Parameters
+    ----------
+    search_tol : float
+        The search tolerance used.
+    """
+    def __init__(self, search_tol):
+        self.search_tol = search_tol
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def npy_cache_home(tmpdir, monkeypatch):
+    """Write .npy draws caches under tmpdir, not the user cache directory"""
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmpdir))
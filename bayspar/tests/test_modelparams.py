@@ -1,8 +1,14 @@
+import os
+import copy
+import pickle
+
 import pytest
 import numpy as np
 
 from bayspar.modelparams import get_draws
-from bayspar.modelparams.core import BadLatlonError
+from bayspar.modelparams import core
+from bayspar.modelparams.core import (BadLatlonError, _ensure_npy_cache,
+                                      get_matlab_resource)
 
 
 def test__index_near():
@@ -37,3 +43,102 @@ def test_find_nearest_latlon():
 
     np.testing.assert_equal(victim1, goal)
     np.testing.assert_equal(victim2, goal)
+
+
+def test_find_alphabeta_near():
+    test_lat = -64.8527
+    test_lon = -64.2080
+
+    draws = get_draws('sst')
+    goal_idx = 114
+
+    victim_alpha, victim_beta = draws.find_alphabeta_near(test_lat, test_lon)
+
+    np.testing.assert_equal(victim_alpha, draws.alpha_samples_comp[goal_idx])
+    np.testing.assert_equal(victim_beta, draws.beta_samples_comp[goal_idx])
+    assert victim_alpha.shape == (draws.alpha_samples_comp.shape[1],)
+
+
+def test_find_alphabeta_batch():
+    test_latlons = [(-64.8527, -64.2080), (-79.497, -18.6999)]
+
+    draws = get_draws('sst')
+
+    victim_alpha, victim_beta = draws.find_alphabeta_batch(test_latlons)
+
+    assert victim_alpha.shape == (2, draws.alpha_samples_comp.shape[1])
+    for i, latlon in enumerate(test_latlons):
+        goal_alpha, goal_beta = draws.find_alphabeta_near(*latlon)
+        np.testing.assert_equal(victim_alpha[i], goal_alpha)
+        np.testing.assert_equal(victim_beta[i], goal_beta)
+
+
+def test_find_nearest_latlon_batch():
+    test_latlons = [(-64.8527, -64.2080), (-79.497, -18.6999)]
+
+    goal = np.array([[-60, -70], [-80, -10]])
+
+    victim = get_draws('sst').find_nearest_latlon_batch(test_latlons)
+
+    np.testing.assert_equal(victim, goal)
+
+    with pytest.raises(BadLatlonError):
+        get_draws('sst').find_nearest_latlon_batch([(45, 240)])
+
+
+def test_draws_readonly():
+    """Shared draws must not be writable"""
+    victim = get_draws('sst')
+
+    assert get_draws('sst') is victim
+    for arr in (victim.alpha_samples_comp, victim.beta_samples_comp,
+                victim.tau2_samples, victim.locs_comp):
+        assert not arr.flags.writeable
+
+
+def test_draws_pickle():
+    """Draws survive a pickle round trip and copies query their own tree"""
+    victim = get_draws('sst')
+    goal = victim.find_nearest_latlon(lat=45, lon=-125)
+
+    for clone in (pickle.loads(pickle.dumps(victim)), copy.deepcopy(victim)):
+        np.testing.assert_equal(clone.alpha_samples_comp,
+                                victim.alpha_samples_comp)
+        assert clone._tree is not victim._tree
+        np.testing.assert_equal(clone.find_nearest_latlon(lat=45, lon=-125),
+                                goal)
+        np.testing.assert_equal(clone.find_nearest_latlon(lat=-30, lon=10),
+                                victim.find_nearest_latlon(lat=-30, lon=10))
+
+
+def test__ensure_npy_cache(tmpdir):
+    """Cached copy is keyed on the packaged file and matches its contents"""
+    resource = 'modelparams/Output_SpatAg_SST/Locs_Comp.mat'
+    source = os.path.join(os.path.dirname(core.__file__), os.pardir,
+                          *resource.split('/'))
+    stat = os.stat(source)
+    cache_dir = tmpdir.join('bayspar', 'npy-v{}'.format(core.NPY_CACHE_VERSION),
+                            'bayspar', 'modelparams', 'Output_SpatAg_SST')
+    stale = cache_dir.ensure('Locs_Comp-1-1.npy')
+
+    path = _ensure_npy_cache(resource, 'Locs_Comp')
+    assert path.startswith(str(tmpdir))
+    assert path.endswith('-{}-{}.npy'.format(stat.st_size, stat.st_mtime_ns))
+    assert _ensure_npy_cache(resource, 'Locs_Comp') == path
+    assert not stale.exists()
+    assert [p.basename for p in cache_dir.listdir()] == [os.path.basename(path)]
+
+    goal = get_matlab_resource(resource, squeeze_me=True)['Locs_Comp']
+    np.testing.assert_array_equal(np.load(path), goal)
+
+
+def test__ensure_npy_cache_failed_write(tmpdir, monkeypatch):
+    """A failed write leaves no temporary file behind"""
+    def bad_save(*args, **kwargs):
+        raise OSError('disk full')
+    monkeypatch.setattr(core.np, 'save', bad_save)
+
+    with pytest.raises(OSError):
+        _ensure_npy_cache('modelparams/Output_SpatAg_SST/Locs_Comp.mat',
+                          'Locs_Comp')
+    assert not [p for p in tmpdir.visit() if p.ext == '.tmp']
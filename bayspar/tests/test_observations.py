@@ -1,7 +1,8 @@
 import pytest
 import numpy as np
 
-from bayspar.observations.core import chord_distance, get_seatemp, get_tex
+from bayspar.observations.core import (chord_distance, get_seatemp, get_tex,
+                                       SeaTempObs)
 
 
 def test_chord_distance():
@@ -18,12 +19,12 @@ def test_distance_from():
     lon = -100
     goal_head = 9010.52256915
     goal_tail = 8828.31316064
-    goal_shape = (37686, 1)
+    goal_shape = (37686,)
 
     victim = get_seatemp('sst').distance_from(lat=lat, lon=lon)
 
-    np.testing.assert_allclose(victim[0, 0], goal_head, atol=1)
-    np.testing.assert_allclose(victim[-1, 0], goal_tail, atol=1)
+    np.testing.assert_allclose(victim[0], goal_head, atol=1)
+    np.testing.assert_allclose(victim[-1], goal_tail, atol=1)
     assert victim.shape == goal_shape
 
 
@@ -51,6 +52,18 @@ def test_get_close_obs():
     assert victim_dists.shape == goal_shape
 
 
+def test_get_close_obs_min_obs_over_size():
+    """min_obs larger than the number of obs gives all obs, sorted"""
+    victim = SeaTempObs(st_obs_ave_vec=np.array([10.0, 20.0, 30.0]),
+                        locs_st_obs=np.array([[0.0, 0.0], [0.0, 10.0], [0.0, 5.0]]))
+
+    victim_obs, victim_dists = victim.get_close_obs(0, 0, distance=500,
+                                                    min_obs=10)
+
+    np.testing.assert_equal(victim_obs, [10.0, 30.0, 20.0])
+    assert np.all(np.diff(victim_dists) > 0)
+
+
 def test_find_within_tolerance():
     # TODO(brews): Manually check this solution with original code.
     x = 0.5
@@ -65,3 +78,15 @@ def test_find_within_tolerance():
 
     assert match_loc == goal_loc
     np.testing.assert_allclose(match_vals, goal_vals, atol=1e-4)
+
+
+def test_obs_shared_readonly():
+    """Shared observations must not be writable"""
+    seatemp = get_seatemp('sst')
+    tex = get_tex('sst')
+
+    assert get_seatemp('sst') is seatemp
+    assert get_tex('sst') is tex
+    for arr in (seatemp.st_obs_ave_vec, seatemp.locs_st_obs, tex.locs,
+                tex.obs_stack, tex.inds_stack, tex.obslocs):
+        assert not arr.flags.writeable
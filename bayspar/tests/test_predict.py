@@ -2,7 +2,9 @@ import pytest
 import numpy as np
 
 from bayspar.predict import (Prediction, predict_seatemp, predict_tex,
-                             predict_seatemp_analog, EnsembleSizeError)
+                             predict_seatemp_analog, EnsembleSizeError,
+                             NoAnalogsError)
+from bayspar.utils import _as_rng
 
 
 def test_percentile():
@@ -13,6 +15,34 @@ def test_percentile():
     np.testing.assert_equal(victim, goal)
 
 
+def test_percentile_nearest():
+    np.random.seed(123)
+    ensemble = np.random.randn(3, 4, 50)
+    prediction_test = Prediction(ensemble=ensemble, temptype='sst')
+
+    q = [0, 2.5, 50, 97.5, 100]
+    goal = np.percentile(ensemble, q=q, axis=(1, 2), interpolation='nearest').T
+    np.testing.assert_equal(prediction_test.percentile(q=q), goal)
+    np.testing.assert_equal(prediction_test.percentile(q=q), goal)
+    np.testing.assert_equal(prediction_test.percentile(q=50), goal[:, 2])
+
+    # In-place changes to the ensemble are picked up.
+    ensemble += 1
+    np.testing.assert_equal(prediction_test.percentile(q=q), goal + 1)
+
+
+def test_percentile_nearest_nan():
+    """Rows with NaN give NaN percentiles, as with numpy.percentile"""
+    ensemble = np.array([[1, 3, np.nan], [1, 3, 2]])
+    prediction_test = Prediction(ensemble=ensemble, temptype='sst')
+
+    q = [0, 50, 100]
+    goal = np.percentile(ensemble, q=q, axis=1, interpolation='nearest').T
+    np.testing.assert_equal(prediction_test.percentile(q=q), goal)
+    np.testing.assert_equal(prediction_test.percentile(q=50), goal[:, 1])
+    assert np.isnan(goal[0]).all()
+
+
 def test_predict_tex_EnsembleSizeError():
     """Check raised error with very large nens from user."""
     proxy_ts = np.array([1, 15, 30])
@@ -52,6 +82,78 @@ def test_predict_tex_sst():
     assert victim.ensemble.shape == goal['predsens'].shape
 
 
+def test_predict_tex_out():
+    """Check ensemble is written into user-supplied array."""
+    proxy_ts = np.array([1, 15, 30])
+    lat = -79.49700165
+    lon = -18.699981690000016
+    nens = 100
+
+    np.random.seed(123)
+    goal = predict_tex(seatemp=proxy_ts, lat=lat, lon=lon, temptype='sst', nens=nens)
+
+    out = np.empty((3, nens))
+    np.random.seed(123)
+    victim = predict_tex(seatemp=proxy_ts, lat=lat, lon=lon, temptype='sst', nens=nens, out=out)
+
+    assert victim.ensemble is out
+    np.testing.assert_equal(victim.ensemble, goal.ensemble)
+
+    with pytest.raises(ValueError):
+        predict_tex(seatemp=proxy_ts, lat=lat, lon=lon, temptype='sst', nens=nens,
+                    out=np.empty((2, nens)))
+
+
+def test_predict_tex_rng():
+    """Check seeded generator gives reproducible ensembles."""
+    proxy_ts = np.array([1, 15, 30])
+    lat = -79.49700165
+    lon = -18.699981690000016
+
+    victim1 = predict_tex(seatemp=proxy_ts, lat=lat, lon=lon, temptype='sst', nens=100, rng=42)
+    victim2 = predict_tex(seatemp=proxy_ts, lat=lat, lon=lon, temptype='sst', nens=100,
+                          rng=_as_rng(42))
+
+    np.testing.assert_equal(victim1.ensemble, victim2.ensemble)
+
+
+def test_predict_seatemp_rng():
+    """Check seeded generator gives reproducible ensembles."""
+    proxy_ts = np.array([0.7900, 0.7400, 0.7700, 0.7000])
+
+    victim1 = predict_seatemp(tex=proxy_ts, lat=-64.8527, lon=-64.2080, prior_std=6,
+                              temptype='sst', prior_mean=1, nens=100, rng=7)
+    victim2 = predict_seatemp(tex=proxy_ts, lat=-64.8527, lon=-64.2080, prior_std=6,
+                              temptype='sst', prior_mean=1, nens=100, rng=7)
+    np.testing.assert_equal(victim1.ensemble, victim2.ensemble)
+
+    victim1 = predict_seatemp_analog(tex=proxy_ts, prior_std=20, temptype='sst', search_tol=0.08,
+                                     prior_mean=30, nens=100, rng=7)
+    victim2 = predict_seatemp_analog(tex=proxy_ts, prior_std=20, temptype='sst', search_tol=0.08,
+                                     prior_mean=30, nens=100, rng=_as_rng(7))
+    np.testing.assert_equal(victim1.ensemble, victim2.ensemble)
+
+
+def test_predict_seatemp_out_float32():
+    """Check single-precision ensemble matches double within tolerance."""
+    proxy_ts = np.array([0.2831, 0.2856, 0.2832])
+    lat = -64.8527
+    lon = -64.2080
+    nens = 100
+
+    np.random.seed(123)
+    goal = predict_seatemp(tex=proxy_ts, lat=lat, lon=lon, prior_std=6,
+                           temptype='sst', prior_mean=1, nens=nens)
+
+    out = np.empty((3, nens), dtype=np.float32)
+    np.random.seed(123)
+    victim = predict_seatemp(tex=proxy_ts, lat=lat, lon=lon, prior_std=6,
+                             temptype='sst', prior_mean=1, nens=nens, out=out)
+
+    assert victim.ensemble.dtype == np.float32
+    np.testing.assert_allclose(victim.ensemble, goal.ensemble, rtol=1e-5, atol=1e-5)
+
+
 @pytest.mark.skip(reason='Not implemented')
 def test_predict_tex_subt():
     # TODO(brews): Need this test.
@@ -91,6 +193,15 @@ def test_predict_seatemp():
     assert victim.ensemble.shape == goal['predsens'].shape
 
 
+def test_predict_seatemp_analog_NoAnalogsError():
+    """Check raised error when no analogs are within search tolerance."""
+    proxy_ts = np.array([5.0, 5.1])
+
+    with pytest.raises(NoAnalogsError):
+        predict_seatemp_analog(tex=proxy_ts, prior_std=20, temptype='sst',
+                               search_tol=0.01, prior_mean=30, progressbar=False)
+
+
 def test_predict_seatemp_analog_sst():
     np.random.seed(123)
 
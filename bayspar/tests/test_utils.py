@@ -1,7 +1,8 @@
 import pytest
 import numpy as np
 
-from bayspar.utils import target_timeseries_pred
+from bayspar.utils import (target_timeseries_pred, target_timeseries_pred_batch,
+                           get_example_data, _as_rng)
 
 
 def test_target_timeseries_pred():
@@ -16,3 +17,155 @@ def test_target_timeseries_pred():
     victim = target_timeseries_pred(alpha_now, beta_now, tau2_now,
                                     proxy_ts, prior_pars)
     np.testing.assert_allclose(victim, goal, atol=1e-4)
+
+
+def test_target_timeseries_pred_dense_cov():
+    """Samples from a correlated prior have the posterior mean and covariance"""
+    np.random.seed(123)
+    proxy_ts = np.array([0.2831, 0.3081])
+    alpha_now = 0.3584
+    beta_now = 0.5
+    tau2_now = 0.5
+    inv_cov = np.linalg.inv(np.array([[1.0, 0.8], [0.8, 1.0]]))
+    prior_pars = {'mu': np.array([0.0535, 0.1]),
+                  'inv_cov': inv_cov}
+
+    inv_post_cov = inv_cov + beta_now ** 2 / tau2_now * np.eye(2)
+    goal_cov = np.linalg.inv(inv_post_cov)
+    goal_mean = goal_cov @ (inv_cov @ prior_pars['mu']
+                            + beta_now / tau2_now * (proxy_ts - alpha_now))
+
+    victim = np.array([target_timeseries_pred(alpha_now, beta_now, tau2_now,
+                                              proxy_ts, prior_pars)
+                       for _ in range(4000)])
+    np.testing.assert_allclose(victim.mean(axis=0), goal_mean, atol=0.05)
+    np.testing.assert_allclose(np.cov(victim.T), goal_cov, atol=0.05)
+
+
+def test_target_timeseries_pred_inv_cov_mu():
+    """Precomputed inv_cov @ mu gives the same sample"""
+    proxy_ts = np.array([0.2831, 0.3081])
+    inv_cov = np.linalg.inv(np.array([[1.0, 0.8], [0.8, 1.0]]))
+    prior_pars = {'mu': np.array([0.0535, 0.1]),
+                  'inv_cov': inv_cov}
+
+    np.random.seed(123)
+    goal = target_timeseries_pred(0.3584, 0.5, 0.5, proxy_ts, prior_pars)
+    prior_pars['inv_cov_mu'] = inv_cov @ prior_pars['mu']
+    np.random.seed(123)
+    victim = target_timeseries_pred(0.3584, 0.5, 0.5, proxy_ts, prior_pars)
+    np.testing.assert_allclose(victim, goal)
+
+
+def test_target_timeseries_pred_dense_scalar_mu():
+    """Scalar mu with a dense prior is broadcast over the time series"""
+    proxy_ts = np.array([0.2831, 0.3081])
+    inv_cov = np.linalg.inv(np.array([[1.0, 0.8], [0.8, 1.0]]))
+
+    np.random.seed(123)
+    goal = target_timeseries_pred(0.3584, 0.5, 0.5, proxy_ts,
+                                  {'mu': np.array([0.1, 0.1]), 'inv_cov': inv_cov})
+    np.random.seed(123)
+    victim = target_timeseries_pred(0.3584, 0.5, 0.5, proxy_ts,
+                                    {'mu': 0.1, 'inv_cov': inv_cov})
+    np.testing.assert_allclose(victim, goal)
+
+
+def test_target_timeseries_pred_diag():
+    """Diagonal prior form matches the equivalent dense prior"""
+    proxy_ts = np.array([0.2831, 0.2856, 0.2832, 0.2854, 0.3081])
+    alpha_now = 0.3584
+    beta_now = 0.0054
+    tau2_now = 0.0016
+    prior_dense = {'mu': np.array([0.0535] * 5),
+                   'inv_cov': np.eye(5) * 0.0278}
+    prior_diag = {'mu': 0.0535, 'inv_cov_diag': 0.0278}
+
+    np.random.seed(123)
+    goal = target_timeseries_pred(alpha_now, beta_now, tau2_now,
+                                  proxy_ts, prior_dense)
+    np.random.seed(123)
+    victim = target_timeseries_pred(alpha_now, beta_now, tau2_now,
+                                    proxy_ts, prior_diag)
+    np.testing.assert_allclose(victim, goal)
+
+
+def test_target_timeseries_pred_batch():
+    """Batch sampling matches draw-by-draw sampling with the same seed"""
+    proxy_ts = np.array([0.2831, 0.2856, 0.2832, 0.2854, 0.3081])
+    alpha = np.array([[0.3584, 0.3], [0.25, 0.31], [0.33, 0.29]])
+    beta = np.array([[0.0054, 0.006], [0.01, 0.007], [0.008, 0.0065]])
+    tau2 = np.array([0.0016, 0.002])
+    tau2_b = np.broadcast_to(tau2, alpha.shape)
+    prior_pars = {'mu': 0.0535, 'inv_cov_diag': 0.0278}
+
+    np.random.seed(123)
+    goal = np.empty((5,) + alpha.shape)
+    for i in range(alpha.shape[0]):
+        for j in range(alpha.shape[1]):
+            goal[:, i, j] = target_timeseries_pred(alpha[i, j], beta[i, j],
+                                                   tau2_b[i, j], proxy_ts,
+                                                   prior_pars)
+    np.random.seed(123)
+    victim = target_timeseries_pred_batch(alpha, beta, tau2_b, proxy_ts,
+                                          prior_pars)
+    assert victim.shape == goal.shape
+    np.testing.assert_allclose(victim, goal)
+
+
+def test_target_timeseries_pred_batch_dense_cov():
+    """Batch samples from a correlated prior have the posterior mean and covariance"""
+    proxy_ts = np.array([0.2831, 0.3081])
+    alpha = np.full((2, 4000), 0.3584)
+    beta = np.full((2, 4000), 0.5)
+    beta[1] = 1.0
+    tau2 = 0.5
+    inv_cov = np.linalg.inv(np.array([[1.0, 0.8], [0.8, 1.0]]))
+    prior_pars = {'mu': np.array([0.0535, 0.1]),
+                  'inv_cov': inv_cov}
+
+    victim = target_timeseries_pred_batch(alpha, beta, tau2, proxy_ts,
+                                          prior_pars, rng=123)
+    assert victim.shape == (2, 2, 4000)
+
+    for i in range(2):
+        inv_post_cov = inv_cov + beta[i, 0] ** 2 / tau2 * np.eye(2)
+        goal_cov = np.linalg.inv(inv_post_cov)
+        goal_mean = goal_cov @ (inv_cov @ prior_pars['mu']
+                                + beta[i, 0] / tau2 * (proxy_ts - alpha[i, 0]))
+        np.testing.assert_allclose(victim[:, i].mean(axis=1), goal_mean, atol=0.05)
+        np.testing.assert_allclose(np.cov(victim[:, i]), goal_cov, atol=0.05)
+
+
+def test_target_timeseries_pred_batch_dense_diag():
+    """A diagonal dense prior takes the diagonal path"""
+    proxy_ts = np.array([0.2831, 0.2856, 0.2832])
+    alpha = np.array([0.3584, 0.3])
+    beta = np.array([0.0054, 0.006])
+    tau2 = np.array([0.0016, 0.002])
+
+    goal = target_timeseries_pred_batch(alpha, beta, tau2, proxy_ts,
+                                        {'mu': 0.0535, 'inv_cov_diag': 0.0278},
+                                        rng=123)
+    victim = target_timeseries_pred_batch(alpha, beta, tau2, proxy_ts,
+                                          {'mu': np.array([0.0535] * 3),
+                                           'inv_cov': np.eye(3) * 0.0278},
+                                          rng=123)
+    np.testing.assert_allclose(victim, goal)
+
+
+def test__as_rng_without_default_rng(monkeypatch):
+    """Seeds fall back to RandomState on numpy without default_rng"""
+    monkeypatch.delattr(np.random, 'default_rng', raising=False)
+    victim = _as_rng(42)
+
+    assert isinstance(victim, np.random.RandomState)
+    np.testing.assert_equal(victim.standard_normal(3),
+                            np.random.RandomState(42).standard_normal(3))
+
+
+def test_get_example_data():
+    with get_example_data('castaneda2010.csv') as example_file:
+        victim = np.genfromtxt(example_file, delimiter=',', names=True)
+    assert victim.dtype.names == ('age', 'tex86')
+    assert victim.size > 0
@@ -2,6 +2,55 @@ import os
 import pkgutil
 import io
 import numpy as np
+from scipy.linalg import cho_factor, cho_solve, solve_triangular
+
+try:
+    from importlib.resources import files as _resource_files
+except ImportError:  # Python < 3.9
+    _resource_files = None
+
+
+def _as_rng(rng):
+    """Get a random number source from a seed, Generator or None
+
+    None gives the legacy global numpy.random state, so ``np.random.seed``
+    still controls results. A RandomState or Generator is used as-is, and
+    anything else seeds a new ``np.random.default_rng``, or a RandomState with
+    numpy < 1.17.
+    """
+    if rng is None:
+        return np.random
+    if isinstance(rng, np.random.RandomState):
+        return rng
+    if not hasattr(np.random, 'default_rng'):  # numpy < 1.17
+        return np.random.RandomState(rng)
+    return np.random.default_rng(rng)
+
+
+def _diagonal_or_none(a):
+    """Diagonal of square matrix a if a is diagonal, otherwise None"""
+    a = np.asarray(a)
+    diag = np.diag(a)
+    if np.count_nonzero(a) == np.count_nonzero(diag):
+        return diag
+    return None
+
+
+def _readonly_samples(x):
+    """Read-only, C-contiguous (row-major) float32 view of array-like x
+
+    Copies only if x is not already laid out this way.
+    """
+    x = np.ascontiguousarray(x, dtype=np.float32).view()
+    x.setflags(write=False)
+    return x
+
+
+def _readonly(x):
+    """Read-only view of array-like x, without copying ndarrays"""
+    x = np.asarray(x).view()
+    x.setflags(write=False)
+    return x
 
 
 def target_timeseries_pred(alpha_now, beta_now, tau2_now, proxy_ts, prior_pars):
@@ -17,10 +66,17 @@ def target_timeseries_pred(alpha_now, beta_now, tau2_now, proxy_ts, prior_pars):
         Time series of the proxy. Assume no temporal structure for now, as
         timing is not equal.
     prior_pars : dict
-        mu : ndarray
+        mu : ndarray or scalar
             Prior means for each element of the time series.
         inv_cov: ndarray
             Inverse of the prior covariance matrix for the time series.
+        inv_cov_diag: ndarray or scalar
+            Diagonal of the inverse prior covariance matrix, for a diagonal
+            prior covariance. Used instead of 'inv_cov' if given. A diagonal
+            'inv_cov' is detected and handled the same way.
+        inv_cov_mu: ndarray, optional
+            Precomputed ``inv_cov @ mu``, to skip the product when calling
+            repeatedly with the same dense prior.
 
     Returns
     -------
@@ -28,24 +84,129 @@ def target_timeseries_pred(alpha_now, beta_now, tau2_now, proxy_ts, prior_pars):
     """
     # TODO(brews): Above docstring is based on original MATLAB. Needs cleanup.
     n_ts = len(proxy_ts)
+    mu = np.broadcast_to(prior_pars['mu'], (n_ts,))
+
+    inv_cov_diag = prior_pars.get('inv_cov_diag')
+    if inv_cov_diag is None:
+        inv_cov_diag = _diagonal_or_none(prior_pars['inv_cov'])
+
+    if inv_cov_diag is not None:
+        # With a diagonal prior the posterior covariance is diagonal too, so
+        # every element is updated independently.
+        post_var = 1 / (inv_cov_diag + beta_now ** 2 / tau2_now)
+        mean_first_factor = inv_cov_diag * mu + (1/tau2_now) * beta_now * (proxy_ts - alpha_now)
+        mean_full = post_var * mean_first_factor
+        return mean_full + np.sqrt(post_var) * np.random.randn(n_ts)
 
     # Inverse posterior covariance matrix
     inv_post_cov = prior_pars['inv_cov'] + beta_now ** 2 / tau2_now * np.eye(n_ts)
 
-    # Used cholesky to speed things up!
-    post_cov = np.linalg.solve(inv_post_cov, np.eye(n_ts))
-    sqrt_post_cov = np.linalg.cholesky(post_cov).T
+    # One Cholesky factorization, inv_post_cov = L @ L.T, serves both the
+    # mean and the sample; the posterior covariance is never formed.
+    chol = cho_factor(inv_post_cov, lower=True)
     # Get first factor for the mean
-    mean_first_factor = prior_pars['inv_cov'] @ prior_pars['mu'] + (1/tau2_now) * beta_now * (proxy_ts - alpha_now)
-    mean_full = post_cov @ mean_first_factor
+    inv_cov_mu = prior_pars.get('inv_cov_mu')
+    if inv_cov_mu is None:
+        inv_cov_mu = prior_pars['inv_cov'] @ mu
+    mean_first_factor = inv_cov_mu + (1/tau2_now) * beta_now * (proxy_ts - alpha_now)
+    mean_full = cho_solve(chol, mean_first_factor)
 
-    timeseries_pred = mean_full + sqrt_post_cov @ np.random.randn(n_ts).T
+    # L^-T @ z has covariance inv(inv_post_cov).
+    timeseries_pred = mean_full + solve_triangular(chol[0], np.random.randn(n_ts),
+                                                   lower=True, trans='T')
 
     return timeseries_pred
 
 
+def target_timeseries_pred_batch(alpha, beta, tau2, proxy_ts, prior_pars, out=None, rng=None):
+    """Sample target time series for many modelparam draws at once
+
+    Vectorized equivalent of calling ``target_timeseries_pred`` for each draw.
+
+    Parameters
+    ----------
+    alpha : ndarray
+    beta : ndarray
+    tau2 : ndarray
+        Draws of alpha, beta and the residual variance. Shapes must broadcast
+        together, e.g. ``tau2`` shared across the rows of ``alpha`` and ``beta``.
+    proxy_ts : ndarray
+        n-length time series of the proxy.
+    prior_pars : dict
+        mu : ndarray or scalar
+            Prior means for each element of the time series.
+        inv_cov_diag: ndarray or scalar
+            Diagonal of the inverse prior covariance matrix.
+        inv_cov: ndarray
+            Inverse of the prior covariance matrix, used if 'inv_cov_diag' is
+            not given.
+        inv_cov_mu: ndarray, optional
+            Precomputed ``inv_cov @ mu`` for a dense prior.
+    out : ndarray, optional
+        Array with the shape of the output to write the samples into.
+    rng : int, numpy.random.Generator, numpy.random.RandomState or None, optional
+        Source of random numbers. If None, the global ``numpy.random`` state
+        is used.
+
+    Returns
+    -------
+    Samples of target time series, an array with shape ``(n,)`` plus the
+    broadcast shape of the draws.
+    With a diagonal prior, random numbers are used in the same order as calling
+    ``target_timeseries_pred`` draw by draw, in C order.
+    """
+    # Trailing axis for the time series.
+    alpha = np.asarray(alpha, dtype=np.float64)[..., np.newaxis]
+    beta = np.asarray(beta, dtype=np.float64)[..., np.newaxis]
+    tau2 = np.asarray(tau2, dtype=np.float64)[..., np.newaxis]
+    inv_cov_diag = prior_pars.get('inv_cov_diag')
+    if inv_cov_diag is None:
+        inv_cov_diag = _diagonal_or_none(prior_pars['inv_cov'])
+
+    shape = (len(proxy_ts),) + np.broadcast(alpha, beta, tau2).shape[:-1]
+    if out is None:
+        out = np.empty(shape)
+    elif out.shape != shape:
+        raise ValueError('out has shape {}, expected {}'.format(out.shape, shape))
+
+    # Build the samples in place, with the time series on the trailing axis.
+    timeseries_pred = np.moveaxis(out, 0, -1)
+
+    if inv_cov_diag is None:
+        # Dense prior. With inv_cov = V @ diag(lam) @ V.T, every draw's inverse
+        # posterior covariance is V @ diag(lam + beta**2/tau2) @ V.T, so one
+        # eigendecomposition serves all draws.
+        inv_cov = np.asarray(prior_pars['inv_cov'], dtype=np.float64)
+        lam, vecs = np.linalg.eigh(inv_cov)
+        post_var = 1 / (lam + beta ** 2 / tau2)
+        inv_cov_mu = prior_pars.get('inv_cov_mu')
+        if inv_cov_mu is None:
+            inv_cov_mu = inv_cov @ np.broadcast_to(prior_pars['mu'], (len(proxy_ts),))
+        mean_first_factor = inv_cov_mu + beta / tau2 * (proxy_ts - alpha)
+        # Work in the eigenbasis, where the posterior is diagonal.
+        coefs = mean_first_factor @ vecs
+        coefs *= post_var
+        noise = _as_rng(rng).standard_normal(coefs.shape)
+        noise *= np.sqrt(post_var)
+        coefs += noise
+        timeseries_pred[...] = coefs @ vecs.T
+        return out
+
+    post_var = 1 / (inv_cov_diag + beta ** 2 / tau2)
+
+    np.subtract(proxy_ts, alpha, out=timeseries_pred)
+    timeseries_pred *= beta / tau2
+    timeseries_pred += inv_cov_diag * prior_pars['mu']
+    timeseries_pred *= post_var
+    noise = _as_rng(rng).standard_normal(timeseries_pred.shape)
+    noise *= np.sqrt(post_var)
+    timeseries_pred += noise
+
+    return out
+
+
 def get_example_data(filename):
-    """Get a BytesIO object for a bayspar example file.
+    """Get a binary stream of a bayspar example file.
 
     Parameters
     ----------
@@ -54,7 +215,10 @@ def get_example_data(filename):
 
     Returns
     -------
-    BytesIO of the example file.
+    Binary file object of the example file, read as it is consumed. A
+    BytesIO copy on Python versions without ``importlib.resources.files``.
     """
-    resource_str = os.path.join('example_data', filename)
-    return io.BytesIO(pkgutil.get_data('bayspar', resource_str))
+    if _resource_files is None:
+        resource_str = os.path.join('example_data', filename)
+        return io.BytesIO(pkgutil.get_data('bayspar', resource_str))
+    return _resource_files('bayspar').joinpath('example_data').joinpath(filename).open('rb')
@@ -36,7 +36,8 @@ setup(
 
     packages=find_packages(exclude=['docs']),
 
-    install_requires=['numpy', 'scipy', 'matplotlib', 'attrs', 'tqdm', 'cartopy'],
+    install_requires=['numpy', 'scipy', 'attrs>=19.2'],
+    extras_require={'plot': ['matplotlib', 'cartopy']},
     tests_require=['pytest'],
     package_data={'bayspar': ['modelparams/Output_SpatAg_subT/*.mat',
                               'modelparams/Output_SpatAg_SST/*.mat',